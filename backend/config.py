@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 import os
 
 class Settings(BaseSettings):
@@ -10,11 +10,32 @@ class Settings(BaseSettings):
     # Gemini API settings
     GEMINI_API_KEY: str
 
+    # Record/replay of Gemini responses: "live", "record" or "replay"
+    GEMINI_MODE: Literal["live", "record", "replay"] = "live"
+    GEMINI_ARCHIVE_DIR: str = "../recordings"
+    GEMINI_REPLAY_TIMING: bool = True
+
     # File storage settings
     UPLOAD_DIR: str = "../static/uploads"
     TUTORIAL_DIR: str = "../static/tutorials"
     GRID_TEMPLATE_PATH: str = "../static/grids/Grid.png"
 
+    # Generated image variants
+    TUTORIAL_THUMBNAIL_SIZE: int = 400
+    TUTORIAL_VARIANT_QUALITY: int = 80
+
+    # Storage lifecycle settings (0 disables the corresponding policy)
+    STORAGE_SWEEP_ENABLED: bool = True
+    STORAGE_SWEEP_INTERVAL_SECONDS: int = 60 * 60
+    STORAGE_SWEEP_BATCH_SIZE: int = 100
+    STORAGE_SWEEP_BATCH_PAUSE_SECONDS: float = 0.5
+    STORAGE_ORPHAN_GRACE_SECONDS: int = 0  # e.g. 3600; 0 disables orphan cleanup
+    UPLOAD_RETENTION_DAYS: int = 0
+    TUTORIAL_RETENTION_DAYS: int = 0
+    UPLOAD_RECOMPRESS_AFTER_DAYS: int = 0
+    UPLOAD_RECOMPRESS_WEBP_QUALITY: int = 80
+    STORAGE_SIZE_BUDGET_MB: int = 0
+
     # API settings
     API_VERSION: str = "v1"
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # 5MB
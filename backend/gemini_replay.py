@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import json
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, List
+from PIL import Image
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+def fingerprint(model_name: str, contents: List[Any]) -> str:
+    """Stable hash of a generate_content request (model, prompt text and image pixels)."""
+    digest = hashlib.sha256(model_name.encode())
+    for item in contents:
+        if isinstance(item, Image.Image):
+            digest.update(f"image:{item.mode}:{item.size}".encode())
+            digest.update(item.tobytes())
+        else:
+            digest.update(f"text:{item}".encode())
+    return digest.hexdigest()
+
+def _archive_path(key: str) -> str:
+    return os.path.join(settings.GEMINI_ARCHIVE_DIR, f"{key}.json")
+
+class RecordingModel:
+    """Wrap a live GenerativeModel and save every response to the archive."""
+
+    def __init__(self, model, model_name: str):
+        self.model = model
+        self.model_name = model_name
+
+    def generate_content(self, contents: List[Any]):
+        key = fingerprint(self.model_name, contents)
+
+        started = time.perf_counter()
+        response = self.model.generate_content(contents)
+        elapsed = time.perf_counter() - started
+
+        parts = []
+        if response.candidates:
+            for part in response.candidates[0].content.parts:
+                if hasattr(part, 'inline_data') and part.inline_data:
+                    parts.append({
+                        "mime_type": part.inline_data.mime_type,
+                        "data": base64.b64encode(part.inline_data.data).decode('utf-8')
+                    })
+                elif getattr(part, 'text', None):
+                    parts.append({"text": part.text})
+
+        os.makedirs(settings.GEMINI_ARCHIVE_DIR, exist_ok=True)
+        with open(_archive_path(key), "w") as f:
+            json.dump({
+                "model": self.model_name,
+                "elapsed": elapsed,
+                "parts": parts
+            }, f)
+
+        logger.info(f"Recorded {self.model_name} response {key[:12]} ({elapsed:.2f}s)")
+        return response
+
+class ReplayModel:
+    """Stand-in for GenerativeModel that plays back archived responses."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def generate_content(self, contents: List[Any]):
+        key = fingerprint(self.model_name, contents)
+        path = _archive_path(key)
+        if not os.path.exists(path):
+            raise LookupError(f"No recorded {self.model_name} response for request {key[:12]}")
+
+        with open(path) as f:
+            recording = json.load(f)
+
+        # generate_content blocks the event loop in live mode too, so sleeping
+        # here reproduces the original latency profile
+        if settings.GEMINI_REPLAY_TIMING:
+            time.sleep(recording["elapsed"])
+
+        parts = []
+        for part in recording["parts"]:
+            if "data" in part:
+                parts.append(SimpleNamespace(
+                    text=None,
+                    inline_data=SimpleNamespace(
+                        mime_type=part["mime_type"],
+                        data=base64.b64decode(part["data"])
+                    )
+                ))
+            else:
+                parts.append(SimpleNamespace(text=part["text"], inline_data=None))
+
+        text = "".join(part.text for part in parts if part.text)
+        candidates = [SimpleNamespace(content=SimpleNamespace(parts=parts))] if parts else []
+        return SimpleNamespace(text=text, candidates=candidates)
@@ -5,6 +5,7 @@ import io
 import os
 from typing import Optional, Tuple
 from config import settings
+from gemini_replay import RecordingModel, ReplayModel
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,13 +17,20 @@ class GeminiService:
 
     def _get_configured_model(self, model_name: str, api_key: Optional[str] = None):
         """Get a configured Gemini model with the appropriate API key."""
+        if settings.GEMINI_MODE == "replay":
+            return ReplayModel(model_name)
+
         key_to_use = api_key if api_key else settings.GEMINI_API_KEY
         if not key_to_use:
             raise ValueError("No API key provided. Please add your Gemini API key.")
 
         # Configure with the appropriate key
         genai.configure(api_key=key_to_use)
-        return genai.GenerativeModel(model_name)
+        model = genai.GenerativeModel(model_name)
+
+        if settings.GEMINI_MODE == "record":
+            return RecordingModel(model, model_name)
+        return model
 
     async def extract_subject_from_image(self, image_base64: str, api_key: Optional[str] = None) -> str:
         """Extract the main subject from an uploaded image using Gemini Vision."""
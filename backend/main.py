@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
@@ -9,6 +9,8 @@ from contextlib import asynccontextmanager
 from models import TutorialRequest, TutorialResponse, TutorialListResponse
 from database import connect_to_mongo, close_mongo_connection
 from tutorial_service import tutorial_service
+from storage_service import storage_service
+from media_service import media_service
 from config import settings
 
 # Configure logging
@@ -25,9 +27,11 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up...")
     await connect_to_mongo()
     await tutorial_service.initialize()
+    await storage_service.start()
     yield
     # Shutdown
     logger.info("Shutting down...")
+    await storage_service.stop()
     await close_mongo_connection()
 
 # Create FastAPI app
@@ -47,7 +51,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
+@app.api_route("/media/tutorials/{filename}", methods=["GET", "HEAD"])
+@app.api_route("/static/tutorials/{filename}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_tutorial_image(filename: str, request: Request):
+    """
+    Serve a generated tutorial image.
+
+    `{stem}.png` always returns the PNG; an extensionless `{stem}` (or
+    `{stem}.thumb`) picks a pre-encoded AVIF/WebP variant the client accepts.
+    Conditional and range requests are supported. The legacy /static/tutorials
+    path is kept for URLs already stored in MongoDB and browser history.
+    """
+    resolved = media_service.resolve(filename, request.headers.get("accept", ""))
+    if not resolved:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    path, media_type, negotiated, fallback = resolved
+    return media_service.build_response(request, path, media_type, negotiated, fallback)
+
+# Mount static files (generated tutorials are served by the route above)
 app.mount("/static", StaticFiles(directory="../static"), name="static")
 
 @app.get("/")
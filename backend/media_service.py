@@ -0,0 +1,209 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from typing import List, Optional, Set, Tuple
+from PIL import Image, features
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+import logging
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+MEDIA_PREFIX = "/media/tutorials"
+LEGACY_PREFIX = "/static/tutorials"
+
+THUMBNAIL_SUFFIX = ".thumb"
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+FALLBACK_CACHE_CONTROL = "public, no-cache"
+# The storage sweep evicts by atime, which relatime/noatime mounts rarely or
+# never update, so serving a file refreshes it at most this often (seconds)
+ACCESS_TOUCH_INTERVAL = 60 * 60
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp", "avif": "image/avif"}
+
+# "tutorial_<hex>" or "tutorial_<hex>.thumb", optionally with an explicit format
+FILENAME_PATTERN = re.compile(
+    r"^(?P<stem>[A-Za-z0-9_-]+(\.thumb)?)(\.(?P<extension>png|webp|avif))?$"
+)
+
+def _avif_supported() -> bool:
+    try:
+        return bool(features.check("avif"))
+    except ValueError:
+        # Older Pillow releases do not know the feature name at all
+        return False
+
+def _accepted_types(accept: str) -> Set[str]:
+    """Media types listed in an Accept header, skipping those with q=0."""
+    accepted = set()
+    for item in accept.split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type and quality > 0:
+            accepted.add(media_type.lower())
+    return accepted
+
+class MediaService:
+    """
+    Serve generated tutorial images.
+
+    Every tutorial is saved once as PNG; a thumbnail and pre-encoded WebP (and
+    AVIF where Pillow supports it) variants are written in the background, so
+    requests only pick a file based on the Accept header and never re-encode.
+    """
+
+    def __init__(self):
+        self.formats: List[Tuple[str, str]] = [("image/webp", "webp")]
+        if _avif_supported():
+            self.formats.insert(0, ("image/avif", "avif"))
+
+    def tutorial_url(self, filename: str) -> str:
+        """Public URL for a generated tutorial image."""
+        return f"{MEDIA_PREFIX}/{filename}"
+
+    def display_url(self, tutorial_image_url: str) -> str:
+        """Format-negotiated URL for showing a tutorial image in the browser."""
+        stem = os.path.splitext(os.path.basename(tutorial_image_url))[0]
+        return self.tutorial_url(stem)
+
+    def thumbnail_url(self, tutorial_image_url: str) -> str:
+        """Format-negotiated URL for the thumbnail of a tutorial image."""
+        return self.display_url(tutorial_image_url) + THUMBNAIL_SUFFIX
+
+    def normalize_url(self, url: str) -> str:
+        """Rewrite legacy /static/tutorials URLs stored in MongoDB."""
+        if url and url.startswith(LEGACY_PREFIX + "/"):
+            return MEDIA_PREFIX + url[len(LEGACY_PREFIX):]
+        return url
+
+    def encode_variants(self, filepath: str):
+        """Write the thumbnail and WebP/AVIF variants next to a tutorial PNG."""
+        stem = os.path.splitext(filepath)[0]
+        thumb_stem = stem + THUMBNAIL_SUFFIX
+
+        with Image.open(filepath) as image:
+            image.load()
+            thumbnail = image.copy()
+            thumbnail.thumbnail((settings.TUTORIAL_THUMBNAIL_SIZE, settings.TUTORIAL_THUMBNAIL_SIZE))
+            self._save_atomic(thumbnail, f"{thumb_stem}.png", "PNG", optimize=True)
+
+            for target_stem, source in ((stem, image), (thumb_stem, thumbnail)):
+                for _, extension in self.formats:
+                    try:
+                        self._save_atomic(
+                            source,
+                            f"{target_stem}.{extension}",
+                            extension.upper(),
+                            quality=settings.TUTORIAL_VARIANT_QUALITY
+                        )
+                    except Exception as e:
+                        logger.warning(f"Could not encode {extension} variant for {filepath}: {e}")
+
+    def _save_atomic(self, image: Image.Image, path: str, image_format: str, **params):
+        """
+        Encode to a hidden temp file next to `path` and rename it into place,
+        so `resolve` never serves a variant that is still being written.
+        """
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            image.save(temp_path, image_format, **params)
+            os.replace(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    def resolve(self, filename: str, accept: str) -> Optional[Tuple[str, str, bool, bool]]:
+        """
+        Map a requested filename to (path, media type, negotiated, fallback).
+
+        Names with an extension are served exactly as named, so the canonical
+        .png URL always returns PNG bytes. Extensionless names pick the best
+        pre-encoded variant the client accepts. Missing thumbnails fall back
+        to the full image, and variants that are not encoded yet fall back to
+        PNG; such fallbacks must not be cached as immutable.
+        """
+        match = FILENAME_PATTERN.match(filename)
+        if not match:
+            return None
+
+        stem, extension = match.group("stem"), match.group("extension")
+        candidates = [stem]
+        if stem.endswith(THUMBNAIL_SUFFIX):
+            candidates.append(stem[:-len(THUMBNAIL_SUFFIX)])
+
+        accepted = _accepted_types(accept)
+        wants_variant = any(media_type in accepted for media_type, _ in self.formats)
+        for index, candidate in enumerate(candidates):
+            base = os.path.join(settings.TUTORIAL_DIR, candidate)
+            if extension:
+                path = f"{base}.{extension}"
+                if os.path.isfile(path):
+                    return path, MEDIA_TYPES[extension], False, index > 0
+                continue
+
+            for media_type, variant in self.formats:
+                path = f"{base}.{variant}"
+                if media_type in accepted and os.path.isfile(path):
+                    return path, media_type, True, index > 0
+            if os.path.isfile(f"{base}.png"):
+                return f"{base}.png", "image/png", True, index > 0 or wants_variant
+
+        return None
+
+    def build_response(
+        self,
+        request: Request,
+        path: str,
+        media_type: str,
+        negotiated: bool,
+        fallback: bool
+    ) -> Response:
+        """Build a cacheable file response; FileResponse handles HEAD and range requests."""
+        stat = os.stat(path)
+        etag = '"' + hashlib.md5(
+            f"{os.path.basename(path)}-{stat.st_mtime_ns}-{stat.st_size}".encode()
+        ).hexdigest() + '"'
+        headers = {
+            "Cache-Control": FALLBACK_CACHE_CONTROL if fallback else CACHE_CONTROL,
+            "ETag": etag,
+        }
+        if negotiated:
+            headers["Vary"] = "Accept"
+
+        self._touch(path, stat)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+
+        # Starlette rejects unknown range units with 400; RFC 9110 says to ignore them
+        range_header = request.headers.get("range")
+        if range_header and not range_header.strip().lower().startswith("bytes="):
+            request.scope["headers"] = [
+                (name, value) for name, value in request.scope["headers"] if name != b"range"
+            ]
+
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+    def _touch(self, path: str, stat: os.stat_result):
+        """Record an access for LRU eviction, keeping mtime (and the ETag) intact."""
+        now = time.time()
+        if now - stat.st_atime < ACCESS_TOUCH_INTERVAL:
+            return
+        try:
+            os.utime(path, ns=(int(now * 1e9), stat.st_mtime_ns))
+        except OSError as e:
+            logger.warning(f"Could not update access time of {path}: {e}")
+
+media_service = MediaService()
@@ -47,6 +47,8 @@ class TutorialResponse(BaseModel):
     tutorial_id: str
     subject: str
     tutorial_image_url: str
+    display_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     steps: List[StepModel]
     created_at: datetime
 
@@ -0,0 +1,97 @@
+import argparse
+import asyncio
+import base64
+import cProfile
+import pstats
+import tempfile
+import time
+import tracemalloc
+
+from config import settings
+from models import TutorialRequest
+from tutorial_service import tutorial_service
+
+def build_request(args) -> TutorialRequest:
+    """Build the same request the frontend would send."""
+    if args.image:
+        with open(args.image, "rb") as f:
+            image = base64.b64encode(f.read()).decode('utf-8')
+        return TutorialRequest(input_type="image", image=image, model=args.model)
+    return TutorialRequest(input_type="topic", topic=args.topic, model=args.model)
+
+async def run_pipeline(request: TutorialRequest, iterations: int) -> list:
+    """Run generate_tutorial repeatedly and return the wall time of each run."""
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        await tutorial_service.generate_tutorial(request)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile the tutorial pipeline against recorded Gemini responses.")
+    parser.add_argument("--topic", default="a cat", help="Topic to generate a tutorial for")
+    parser.add_argument("--image", help="Path to an image to use instead of a topic")
+    parser.add_argument("--model", default="gemini-2.5-flash-image", help="Image generation model")
+    parser.add_argument("--iterations", type=int, default=5, help="Number of pipeline runs")
+    parser.add_argument("--record", action="store_true", help="Call the live API once and record the responses")
+    parser.add_argument("--timing", action="store_true", help="Replay with the original API latency")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument", "none"], default="cprofile")
+    parser.add_argument("--allocations", action="store_true", help="Report top allocation sites with tracemalloc")
+    parser.add_argument("--output", help="Write cProfile stats or pyinstrument HTML to this file")
+    args = parser.parse_args()
+
+    settings.GEMINI_MODE = "record" if args.record else "replay"
+    settings.GEMINI_REPLAY_TIMING = args.timing
+
+    # Variant encoding is the largest Python-side cost; run it inline so it is
+    # part of each run's timing and visible to cProfile (main thread only)
+    tutorial_service.encode_variants_in_background = False
+
+    # Keep profiling output out of static/
+    output_dir = tempfile.mkdtemp(prefix="tutorial_profile_")
+    settings.UPLOAD_DIR = output_dir
+    settings.TUTORIAL_DIR = output_dir
+
+    request = build_request(args)
+    iterations = 1 if args.record else args.iterations
+
+    if args.allocations:
+        tracemalloc.start()
+
+    if args.profiler == "pyinstrument":
+        from pyinstrument import Profiler
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        timings = asyncio.run(run_pipeline(request, iterations))
+        profiler.stop()
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(profiler.output_html())
+        else:
+            print(profiler.output_text(unicode=True, color=True))
+    elif args.profiler == "cprofile":
+        profiler = cProfile.Profile()
+        timings = profiler.runcall(asyncio.run, run_pipeline(request, iterations))
+        stats = pstats.Stats(profiler).sort_stats("cumulative")
+        if args.output:
+            stats.dump_stats(args.output)
+        else:
+            stats.print_stats(30)
+    else:
+        timings = asyncio.run(run_pipeline(request, iterations))
+
+    if args.allocations:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Allocated: current {current / 1024:.0f} KiB, peak {peak / 1024:.0f} KiB")
+        for stat in snapshot.statistics("lineno")[:15]:
+            print(stat)
+
+    timings.sort()
+    print(f"Runs: {len(timings)}, min {timings[0]:.3f}s, median {timings[len(timings) // 2]:.3f}s, max {timings[-1]:.3f}s")
+    print(f"Generated files written to {output_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+import asyncio
+import heapq
+import os
+import time
+from typing import Dict, Optional, Tuple
+from PIL import Image
+import logging
+
+from database import get_database
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+UPLOADS = "uploads"
+TUTORIALS = "tutorials"
+
+# An image keeps its stem when it is recompressed or encoded into thumbnail
+# and WebP/AVIF variants, so every file with the same stem belongs to it
+IMAGE_SUFFIXES = (".png", ".webp", ".avif", ".thumb.png", ".thumb.webp", ".thumb.avif")
+
+def _stem(filename: str) -> str:
+    """Group key shared by all files of one image."""
+    return filename.split(".", 1)[0]
+
+class StorageService:
+    """
+    Background lifecycle manager for static/uploads and static/tutorials.
+
+    Each sweep deletes orphaned files, applies retention, recompresses old
+    PNG originals to WebP and evicts least-recently-used files to stay under
+    the size budget. Work is done in small batches with pauses in between so
+    the sweep does not compete with request traffic.
+    """
+
+    def __init__(self):
+        self.db = None
+        # Files older than this predate MongoDB tracking and are never orphans
+        self.tracking_since: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the periodic sweep in the background."""
+        self.db = get_database()
+        if self.db is not None:
+            self.tracking_since = time.time()
+        if not settings.STORAGE_SWEEP_ENABLED:
+            logger.info("Storage sweep disabled")
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background sweep."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error during storage sweep: {e}")
+            await asyncio.sleep(settings.STORAGE_SWEEP_INTERVAL_SECONDS)
+
+    async def sweep(self) -> Dict[str, int]:
+        """Run a single lifecycle pass and return counters for each action."""
+        stats = {"orphans": 0, "expired": 0, "recompressed": 0, "evicted": 0}
+
+        # Without MongoDB we cannot tell which files are still referenced
+        # (history then lives only in the browser), so leave everything alone.
+        if self.db is None:
+            logger.warning("MongoDB not available - skipping storage sweep")
+            return stats
+
+        references = await self._load_references()
+        now = time.time()
+        grace = settings.STORAGE_ORPHAN_GRACE_SECONDS
+
+        # (kind, stem) -> [last access, total size, tutorial_id] for every
+        # image that survives, with all of its files folded into one entry
+        survivors: Dict[Tuple[str, str], list] = {}
+        removed = set()
+        orphans = set()
+
+        # Tutorials go first so that originals of expired tutorials are not
+        # recompressed or counted against the budget afterwards.
+        for kind, directory in ((TUTORIALS, settings.TUTORIAL_DIR), (UPLOADS, settings.UPLOAD_DIR)):
+            retention_days = (
+                settings.UPLOAD_RETENTION_DAYS if kind == UPLOADS else settings.TUTORIAL_RETENTION_DAYS
+            )
+            async for entry in self._scan(directory):
+                stem = _stem(entry.name)
+                if (kind, stem) in removed:
+                    continue
+                stat = entry.stat()
+                age = now - stat.st_mtime
+                tutorial_id = references[kind].get(stem)
+
+                if tutorial_id is None:
+                    # Files are written before their document is inserted, so
+                    # only treat them as orphans once the grace period is over.
+                    # Files from before MongoDB was connected may still be in
+                    # browser history, so they are left alone.
+                    if (
+                        grace
+                        and age > grace
+                        and self.tracking_since is not None
+                        and stat.st_mtime >= self.tracking_since
+                    ):
+                        self._remove_file(entry.path)
+                        orphans.add((kind, stem))
+                    continue
+
+                if retention_days and age > retention_days * 86400:
+                    await self._expire(kind, stem, tutorial_id, references)
+                    survivors.pop((kind, stem), None)
+                    removed.add((kind, stem))
+                    stats["expired"] += 1
+                    continue
+
+                size = stat.st_size
+                if (
+                    kind == UPLOADS
+                    and settings.UPLOAD_RECOMPRESS_AFTER_DAYS
+                    and entry.name.endswith(".png")
+                    and age > settings.UPLOAD_RECOMPRESS_AFTER_DAYS * 86400
+                ):
+                    new_size = await self._recompress(entry.path, tutorial_id)
+                    if new_size is not None:
+                        size = new_size
+                        stats["recompressed"] += 1
+                    # The WebP copy may still show up later in this scan
+                    removed.add((kind, stem))
+
+                group = survivors.setdefault((kind, stem), [0.0, 0, tutorial_id])
+                group[0] = max(group[0], stat.st_atime)
+                group[1] += size
+
+        stats["orphans"] = len(orphans)
+        stats["evicted"] = await self._enforce_budget(survivors, references)
+
+        logger.info(f"Storage sweep finished: {stats}")
+        return stats
+
+    async def _load_references(self) -> Dict[str, Dict[str, str]]:
+        """Stream the tutorials collection and map referenced file stems to tutorial IDs."""
+        references: Dict[str, Dict[str, str]] = {UPLOADS: {}, TUTORIALS: {}}
+        cursor = self.db.tutorials.find(
+            {}, {"original_image_url": 1, "tutorial_image_url": 1}
+        ).batch_size(settings.STORAGE_SWEEP_BATCH_SIZE)
+
+        count = 0
+        async for doc in cursor:
+            if doc.get("original_image_url"):
+                references[UPLOADS][_stem(os.path.basename(doc["original_image_url"]))] = doc["_id"]
+            if doc.get("tutorial_image_url"):
+                references[TUTORIALS][_stem(os.path.basename(doc["tutorial_image_url"]))] = doc["_id"]
+
+            count += 1
+            if count % settings.STORAGE_SWEEP_BATCH_SIZE == 0:
+                await asyncio.sleep(settings.STORAGE_SWEEP_BATCH_PAUSE_SECONDS)
+
+        return references
+
+    async def _scan(self, directory: str):
+        """Yield regular files from a directory, pausing after every batch."""
+        if not os.path.isdir(directory):
+            return
+
+        count = 0
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or entry.name.startswith("."):
+                    continue
+                yield entry
+
+                count += 1
+                if count % settings.STORAGE_SWEEP_BATCH_SIZE == 0:
+                    await asyncio.sleep(settings.STORAGE_SWEEP_BATCH_PAUSE_SECONDS)
+
+    async def _expire(
+        self,
+        kind: str,
+        stem: str,
+        tutorial_id: str,
+        references: Dict[str, Dict[str, str]]
+    ) -> Optional[str]:
+        """
+        Delete an image with all its files and drop its reference from MongoDB.
+        Returns the stem of the original removed along with an expired tutorial.
+        """
+        references[kind].pop(stem, None)
+        if kind == UPLOADS:
+            # The tutorial itself is still useful without its source image
+            await self.db.tutorials.update_one(
+                {"_id": tutorial_id}, {"$set": {"original_image_url": None}}
+            )
+            self._remove_group(settings.UPLOAD_DIR, stem)
+            return None
+
+        doc = await self.db.tutorials.find_one_and_delete({"_id": tutorial_id})
+        self._remove_group(settings.TUTORIAL_DIR, stem)
+        if not doc or not doc.get("original_image_url"):
+            return None
+
+        original = _stem(os.path.basename(doc["original_image_url"]))
+        references[UPLOADS].pop(original, None)
+        self._remove_group(settings.UPLOAD_DIR, original)
+        return original
+
+    async def _recompress(self, path: str, tutorial_id: str) -> Optional[int]:
+        """Re-encode a PNG original as WebP and point its tutorial at the new file."""
+        try:
+            new_path = await asyncio.to_thread(self._encode_webp, path)
+        except Exception as e:
+            logger.error(f"Error recompressing {path}: {e}")
+            return None
+
+        await self.db.tutorials.update_one(
+            {"_id": tutorial_id},
+            {"$set": {
+                "original_image_url": f"/static/uploads/{os.path.basename(new_path)}",
+            }}
+        )
+        self._remove_file(path)
+        return os.path.getsize(new_path)
+
+    def _encode_webp(self, path: str) -> str:
+        new_path = os.path.splitext(path)[0] + ".webp"
+        # Keep the original timestamps so retention and LRU order are unaffected
+        stat = os.stat(path)
+        with Image.open(path) as image:
+            image.save(new_path, "WEBP", quality=settings.UPLOAD_RECOMPRESS_WEBP_QUALITY, method=4)
+        os.utime(new_path, (stat.st_atime, stat.st_mtime))
+        return new_path
+
+    async def _enforce_budget(
+        self,
+        survivors: Dict[Tuple[str, str], list],
+        references: Dict[str, Dict[str, str]]
+    ) -> int:
+        """Evict least-recently-used images until the total size fits the budget."""
+        if not settings.STORAGE_SIZE_BUDGET_MB:
+            return 0
+
+        budget = settings.STORAGE_SIZE_BUDGET_MB * 1024 * 1024
+        total = sum(size for _, size, _ in survivors.values())
+        if total <= budget:
+            return 0
+
+        heap = [
+            (last_access, size, kind, stem, tutorial_id)
+            for (kind, stem), (last_access, size, tutorial_id) in survivors.items()
+        ]
+        heapq.heapify(heap)
+
+        evicted = 0
+        while heap and total > budget:
+            _, size, kind, stem, tutorial_id = heapq.heappop(heap)
+            if stem not in references[kind]:
+                # Already removed (and subtracted) together with an evicted tutorial
+                continue
+            original = await self._expire(kind, stem, tutorial_id, references)
+            total -= size
+            if original and (UPLOADS, original) in survivors:
+                total -= survivors[(UPLOADS, original)][1]
+            evicted += 1
+
+            if evicted % settings.STORAGE_SWEEP_BATCH_SIZE == 0:
+                await asyncio.sleep(settings.STORAGE_SWEEP_BATCH_PAUSE_SECONDS)
+
+        return evicted
+
+    def _remove_group(self, directory: str, stem: str):
+        for suffix in IMAGE_SUFFIXES:
+            self._remove_file(os.path.join(directory, stem + suffix))
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.error(f"Error removing {path}: {e}")
+
+storage_service = StorageService()
@@ -0,0 +1,75 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from config import settings
+from gemini_replay import RecordingModel, ReplayModel, fingerprint
+
+MODEL = "gemini-2.5-flash-image"
+
+@pytest.fixture(autouse=True)
+def archive(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "GEMINI_ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "GEMINI_REPLAY_TIMING", False)
+    return tmp_path
+
+def _image(color="red"):
+    return Image.new("RGB", (16, 16), color)
+
+def _png_bytes():
+    buffer = io.BytesIO()
+    _image("blue").save(buffer, "PNG")
+    return buffer.getvalue()
+
+class StubModel:
+    """Returns a text part and an inline image part, like the live API."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, contents):
+        self.calls += 1
+        parts = [
+            SimpleNamespace(text="a sleeping cat", inline_data=None),
+            SimpleNamespace(
+                text=None,
+                inline_data=SimpleNamespace(mime_type="image/png", data=_png_bytes())
+            ),
+        ]
+        return SimpleNamespace(
+            text="a sleeping cat",
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=parts))]
+        )
+
+def test_fingerprint_is_stable():
+    assert fingerprint(MODEL, ["prompt", _image()]) == fingerprint(MODEL, ["prompt", _image()])
+
+def test_fingerprint_depends_on_pixels_prompt_and_model():
+    base = fingerprint(MODEL, ["prompt", _image()])
+
+    changed = _image()
+    changed.putpixel((3, 3), (0, 0, 0))
+    assert fingerprint(MODEL, ["prompt", changed]) != base
+    assert fingerprint(MODEL, ["other prompt", _image()]) != base
+    assert fingerprint("gemini-2.0-flash-exp", ["prompt", _image()]) != base
+
+def test_record_then_replay_round_trip():
+    stub = StubModel()
+    contents = ["draw a cat", _image()]
+    RecordingModel(stub, MODEL).generate_content(contents)
+
+    response = ReplayModel(MODEL).generate_content(["draw a cat", _image()])
+
+    assert stub.calls == 1
+    assert response.text == "a sleeping cat"
+    images = [
+        part.inline_data.data
+        for part in response.candidates[0].content.parts
+        if part.inline_data
+    ]
+    assert images == [_png_bytes()]
+
+    with pytest.raises(LookupError):
+        ReplayModel(MODEL).generate_content(["draw a dog", _image()])
@@ -0,0 +1,124 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+import main
+from config import settings
+from media_service import media_service
+
+BROWSER_ACCEPT = "image/avif,image/webp,image/apng,image/*,*/*;q=0.8"
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TUTORIAL_DIR", str(tmp_path))
+    return TestClient(main.app)
+
+def _save_png(path):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), "red").save(buffer, "PNG")
+    path.write_bytes(buffer.getvalue())
+
+def test_png_url_is_never_negotiated(client, tmp_path):
+    _save_png(tmp_path / "tutorial_abc.png")
+    media_service.encode_variants(str(tmp_path / "tutorial_abc.png"))
+
+    response = client.get("/media/tutorials/tutorial_abc.png", headers={"accept": BROWSER_ACCEPT})
+    assert response.headers["content-type"] == "image/png"
+    assert "immutable" in response.headers["cache-control"]
+
+    response = client.get("/media/tutorials/tutorial_abc", headers={"accept": BROWSER_ACCEPT})
+    assert response.headers["content-type"] in ("image/avif", "image/webp")
+    assert "Accept" in response.headers["vary"]
+
+def test_negotiation_skips_types_with_zero_quality(client, tmp_path):
+    _save_png(tmp_path / "tutorial_abc.png")
+    media_service.encode_variants(str(tmp_path / "tutorial_abc.png"))
+
+    response = client.get(
+        "/media/tutorials/tutorial_abc",
+        headers={"accept": "image/avif;q=0,image/webp;q=0,image/png"}
+    )
+    assert response.headers["content-type"] == "image/png"
+
+def test_missing_thumbnail_falls_back_to_full_image(client, tmp_path):
+    _save_png(tmp_path / "tutorial_abc.png")
+
+    response = client.get(media_service.thumbnail_url("/media/tutorials/tutorial_abc.png"))
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert "immutable" not in response.headers["cache-control"]
+
+def test_head_and_range_requests(client, tmp_path):
+    _save_png(tmp_path / "tutorial_abc.png")
+    size = (tmp_path / "tutorial_abc.png").stat().st_size
+
+    response = client.head("/static/tutorials/tutorial_abc.png")
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(size)
+
+    response = client.get("/media/tutorials/tutorial_abc.png", headers={"range": "bytes=0-9"})
+    assert response.status_code == 206
+    assert len(response.content) == 10
+
+    response = client.get("/media/tutorials/tutorial_abc.png", headers={"range": "bytes=0-1,4-5"})
+    assert response.status_code == 206
+
+    response = client.get("/media/tutorials/tutorial_abc.png", headers={"range": "items=0-1"})
+    assert response.status_code == 200
+
+def test_etag_revalidation(client, tmp_path):
+    _save_png(tmp_path / "tutorial_abc.png")
+
+    etag = client.get("/media/tutorials/tutorial_abc.png").headers["etag"]
+    response = client.get("/media/tutorials/tutorial_abc.png", headers={"if-none-match": etag})
+    assert response.status_code == 304
+
+def test_serving_records_access_time(client, tmp_path):
+    path = tmp_path / "tutorial_abc.png"
+    _save_png(path)
+    os.utime(path, (0, path.stat().st_mtime))
+    mtime_ns = path.stat().st_mtime_ns
+
+    client.get("/media/tutorials/tutorial_abc.png")
+
+    assert path.stat().st_atime > time.time() - 60
+    assert path.stat().st_mtime_ns == mtime_ns
+
+def test_variant_is_not_served_while_being_encoded(client, tmp_path, monkeypatch):
+    _save_png(tmp_path / "tutorial_abc.png")
+    started = threading.Event()
+    release = threading.Event()
+    original_save = Image.Image.save
+
+    def slow_save(image, fp, format=None, **params):
+        if format in ("WEBP", "AVIF") and not started.is_set():
+            # Leave an empty file behind, as an encoder part-way through would
+            open(fp, "wb").close()
+            started.set()
+            release.wait(5)
+        return original_save(image, fp, format, **params)
+
+    monkeypatch.setattr(Image.Image, "save", slow_save)
+    encoder = threading.Thread(
+        target=media_service.encode_variants, args=(str(tmp_path / "tutorial_abc.png"),)
+    )
+    encoder.start()
+    try:
+        assert started.wait(5)
+        response = client.get("/media/tutorials/tutorial_abc", headers={"accept": BROWSER_ACCEPT})
+        assert response.headers["content-type"] == "image/png"
+        assert len(response.content) > 0
+        assert "immutable" not in response.headers["cache-control"]
+    finally:
+        release.set()
+        encoder.join()
+
+    response = client.get("/media/tutorials/tutorial_abc", headers={"accept": BROWSER_ACCEPT})
+    assert response.headers["content-type"] in ("image/avif", "image/webp")
+    assert len(response.content) > 0
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
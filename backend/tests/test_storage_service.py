@@ -0,0 +1,242 @@
+import asyncio
+import os
+import time
+import uuid
+
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from PIL import Image
+
+from config import settings
+from storage_service import StorageService
+
+@pytest.fixture
+def storage_dirs(tmp_path, monkeypatch):
+    upload_dir = tmp_path / "uploads"
+    tutorial_dir = tmp_path / "tutorials"
+    upload_dir.mkdir()
+    tutorial_dir.mkdir()
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(upload_dir))
+    monkeypatch.setattr(settings, "TUTORIAL_DIR", str(tutorial_dir))
+    monkeypatch.setattr(settings, "STORAGE_SWEEP_BATCH_PAUSE_SECONDS", 0)
+    monkeypatch.setattr(settings, "STORAGE_ORPHAN_GRACE_SECONDS", 3600)
+    monkeypatch.setattr(settings, "UPLOAD_RETENTION_DAYS", 0)
+    monkeypatch.setattr(settings, "TUTORIAL_RETENTION_DAYS", 0)
+    monkeypatch.setattr(settings, "UPLOAD_RECOMPRESS_AFTER_DAYS", 0)
+    monkeypatch.setattr(settings, "STORAGE_SIZE_BUDGET_MB", 0)
+    return upload_dir, tutorial_dir
+
+def _write(path, age_seconds=0, size=10, accessed_seconds_ago=None):
+    path.write_bytes(b"x" * size)
+    stamp = time.time() - age_seconds
+    access = time.time() - accessed_seconds_ago if accessed_seconds_ago is not None else stamp
+    os.utime(path, (access, stamp))
+
+def _save_png(path, age_seconds=0):
+    Image.new("RGB", (32, 32), "red").save(path, "PNG")
+    stamp = time.time() - age_seconds
+    os.utime(path, (stamp, stamp))
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def batch_size(self, size):
+        return self
+
+    async def __aiter__(self):
+        for doc in list(self.docs):
+            yield dict(doc)
+
+class FakeCollection:
+    """The subset of a Motor collection the sweep uses, kept in memory."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.docs)
+
+    async def update_one(self, query, update):
+        for doc in self.docs:
+            if doc["_id"] == query["_id"]:
+                doc.update(update["$set"])
+
+    async def find_one_and_delete(self, query):
+        for doc in self.docs:
+            if doc["_id"] == query["_id"]:
+                self.docs.remove(doc)
+                return doc
+        return None
+
+class FakeDatabase:
+    def __init__(self, docs):
+        self.tutorials = FakeCollection(docs)
+
+def _service(docs, tracking_since=None):
+    service = StorageService()
+    service.db = FakeDatabase(docs)
+    service.tracking_since = tracking_since if tracking_since is not None else time.time() - 86400
+    return service
+
+def _tutorial(name, original=None):
+    return {
+        "_id": name,
+        "original_image_url": f"/static/uploads/original_{name}.png" if original else None,
+        "tutorial_image_url": f"/media/tutorials/tutorial_{name}.png",
+    }
+
+def test_sweep_uses_motor_database_without_truth_testing(storage_dirs):
+    async def run():
+        client = AsyncIOMotorClient("mongodb://localhost:1", serverSelectionTimeoutMS=100)
+        service = StorageService()
+        service.db = client["drawing_tutor_test"]
+        try:
+            # Reaching the server (and failing) means the db guard passed
+            with pytest.raises(ServerSelectionTimeoutError):
+                await service.sweep()
+        finally:
+            client.close()
+
+    asyncio.run(run())
+
+def test_sweep_against_mongodb(storage_dirs):
+    upload_dir, tutorial_dir = storage_dirs
+
+    async def run():
+        client = AsyncIOMotorClient(settings.MONGODB_URL, serverSelectionTimeoutMS=500)
+        try:
+            await client.admin.command("ping")
+        except ServerSelectionTimeoutError:
+            client.close()
+            pytest.skip("MongoDB not available")
+
+        database = client[f"drawing_tutor_test_{uuid.uuid4().hex}"]
+        try:
+            await database.tutorials.insert_one({
+                "_id": "kept",
+                "original_image_url": "/static/uploads/original_kept.png",
+                "tutorial_image_url": "/static/tutorials/tutorial_kept.png",
+            })
+            _write(upload_dir / "original_kept.png", age_seconds=7200)
+            _write(tutorial_dir / "tutorial_kept.png", age_seconds=7200)
+            _write(tutorial_dir / "tutorial_orphan.png", age_seconds=7200)
+            _write(tutorial_dir / "tutorial_orphan.webp", age_seconds=7200)
+            _write(tutorial_dir / "tutorial_in_flight.png")
+
+            service = StorageService()
+            service.db = database
+            service.tracking_since = time.time() - 86400
+            stats = await service.sweep()
+        finally:
+            await client.drop_database(database.name)
+            client.close()
+
+        assert stats["orphans"] == 1
+        assert sorted(os.listdir(tutorial_dir)) == ["tutorial_in_flight.png", "tutorial_kept.png"]
+        assert os.listdir(upload_dir) == ["original_kept.png"]
+
+    asyncio.run(run())
+
+def test_orphans_respect_grace_period_and_tracking_start(storage_dirs):
+    _, tutorial_dir = storage_dirs
+    _write(tutorial_dir / "tutorial_orphan.png", age_seconds=7200)
+    _write(tutorial_dir / "tutorial_orphan.thumb.png", age_seconds=7200)
+    _write(tutorial_dir / "tutorial_in_flight.png")
+    _write(tutorial_dir / "tutorial_before_mongo.png", age_seconds=7200)
+
+    service = _service([], tracking_since=time.time() - 3 * 3600)
+    os.utime(tutorial_dir / "tutorial_before_mongo.png", (0, service.tracking_since - 60))
+    stats = asyncio.run(service.sweep())
+
+    assert stats["orphans"] == 1
+    assert sorted(os.listdir(tutorial_dir)) == ["tutorial_before_mongo.png", "tutorial_in_flight.png"]
+
+def test_zero_grace_disables_orphan_cleanup(storage_dirs, monkeypatch):
+    _, tutorial_dir = storage_dirs
+    monkeypatch.setattr(settings, "STORAGE_ORPHAN_GRACE_SECONDS", 0)
+    _write(tutorial_dir / "tutorial_orphan.png", age_seconds=7200)
+
+    stats = asyncio.run(_service([]).sweep())
+
+    assert stats["orphans"] == 0
+    assert os.listdir(tutorial_dir) == ["tutorial_orphan.png"]
+
+def test_tutorial_retention_deletes_document_and_files(storage_dirs, monkeypatch):
+    upload_dir, tutorial_dir = storage_dirs
+    monkeypatch.setattr(settings, "TUTORIAL_RETENTION_DAYS", 1)
+    docs = [_tutorial("old", original=True), _tutorial("new")]
+    _write(tutorial_dir / "tutorial_old.png", age_seconds=2 * 86400)
+    _write(tutorial_dir / "tutorial_old.webp", age_seconds=2 * 86400)
+    _write(upload_dir / "original_old.png", age_seconds=2 * 86400)
+    _write(tutorial_dir / "tutorial_new.png")
+
+    stats = asyncio.run(_service(docs).sweep())
+
+    assert stats["expired"] == 1
+    assert [doc["_id"] for doc in docs] == ["new"]
+    assert os.listdir(tutorial_dir) == ["tutorial_new.png"]
+    assert os.listdir(upload_dir) == []
+
+def test_upload_retention_keeps_tutorial(storage_dirs, monkeypatch):
+    upload_dir, tutorial_dir = storage_dirs
+    monkeypatch.setattr(settings, "UPLOAD_RETENTION_DAYS", 1)
+    docs = [_tutorial("a", original=True)]
+    _write(tutorial_dir / "tutorial_a.png", age_seconds=2 * 86400)
+    _write(upload_dir / "original_a.png", age_seconds=2 * 86400)
+
+    asyncio.run(_service(docs).sweep())
+
+    assert docs[0]["original_image_url"] is None
+    assert os.listdir(tutorial_dir) == ["tutorial_a.png"]
+    assert os.listdir(upload_dir) == []
+
+def test_recompress_replaces_png_original_with_webp(storage_dirs, monkeypatch):
+    upload_dir, tutorial_dir = storage_dirs
+    monkeypatch.setattr(settings, "UPLOAD_RECOMPRESS_AFTER_DAYS", 1)
+    docs = [_tutorial("a", original=True)]
+    _write(tutorial_dir / "tutorial_a.png")
+    _save_png(upload_dir / "original_a.png", age_seconds=2 * 86400)
+    mtime = (upload_dir / "original_a.png").stat().st_mtime
+
+    stats = asyncio.run(_service(docs).sweep())
+
+    assert stats["recompressed"] == 1
+    assert os.listdir(upload_dir) == ["original_a.webp"]
+    assert docs[0]["original_image_url"] == "/static/uploads/original_a.webp"
+    assert (upload_dir / "original_a.webp").stat().st_mtime == mtime
+
+def test_budget_evicts_least_recently_used_tutorial(storage_dirs, monkeypatch):
+    _, tutorial_dir = storage_dirs
+    monkeypatch.setattr(settings, "STORAGE_SIZE_BUDGET_MB", 1)
+    docs = [_tutorial("stale"), _tutorial("fresh")]
+    # Both created at the same time, but only "fresh" was served recently
+    _write(tutorial_dir / "tutorial_stale.png", age_seconds=86400, size=600 * 1024)
+    _write(tutorial_dir / "tutorial_fresh.png", age_seconds=86400, size=300 * 1024)
+    _write(tutorial_dir / "tutorial_fresh.thumb.png", age_seconds=86400, size=300 * 1024,
+           accessed_seconds_ago=10)
+
+    stats = asyncio.run(_service(docs).sweep())
+
+    assert stats["evicted"] == 1
+    assert [doc["_id"] for doc in docs] == ["fresh"]
+    assert sorted(os.listdir(tutorial_dir)) == ["tutorial_fresh.png", "tutorial_fresh.thumb.png"]
+
+def test_budget_counts_original_removed_with_evicted_tutorial(storage_dirs, monkeypatch):
+    upload_dir, tutorial_dir = storage_dirs
+    monkeypatch.setattr(settings, "STORAGE_SIZE_BUDGET_MB", 1)
+    docs = [_tutorial("old", original=True), _tutorial("new")]
+    _write(tutorial_dir / "tutorial_old.png", age_seconds=2 * 86400, size=100 * 1024)
+    # The original was touched recently, so "new" would be next in LRU order
+    _write(upload_dir / "original_old.png", age_seconds=86400, size=700 * 1024,
+           accessed_seconds_ago=10)
+    _write(tutorial_dir / "tutorial_new.png", age_seconds=3600, size=400 * 1024)
+
+    stats = asyncio.run(_service(docs).sweep())
+
+    # Evicting "old" frees its original too, which is enough on its own
+    assert stats["evicted"] == 1
+    assert [doc["_id"] for doc in docs] == ["new"]
+    assert os.listdir(upload_dir) == []
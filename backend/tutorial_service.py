@@ -1,5 +1,6 @@
 from typing import List, Optional
 from datetime import datetime
+import asyncio
 import uuid
 import os
 import base64
@@ -18,6 +19,7 @@ from models import (
 )
 from database import get_database
 from gemini_service import gemini_service
+from media_service import media_service
 from config import settings
 
 logger = logging.getLogger(__name__)
@@ -25,6 +27,10 @@ logger = logging.getLogger(__name__)
 class TutorialService:
     def __init__(self):
         self.db = None
+        # Keep references to variant encoding tasks so they are not garbage collected
+        self._background_tasks = set()
+        # Profiling turns this off so encoding runs on the profiled thread
+        self.encode_variants_in_background = True
 
     async def initialize(self):
         """Initialize the service with database connection."""
@@ -88,7 +94,7 @@ class TutorialService:
             }
 
             # Save to MongoDB if available
-            if self.db:
+            if self.db is not None:
                 await self.db.tutorials.insert_one(tutorial_doc)
             else:
                 logger.warning("MongoDB not available - tutorial will not be saved to history")
@@ -98,6 +104,8 @@ class TutorialService:
                 tutorial_id=tutorial_id,
                 subject=subject,
                 tutorial_image_url=tutorial_image_url,
+                display_url=media_service.display_url(tutorial_image_url),
+                thumbnail_url=media_service.thumbnail_url(tutorial_image_url),
                 steps=[StepModel(**step) for step in steps],
                 created_at=tutorial_doc["created_at"]
             )
@@ -109,7 +117,7 @@ class TutorialService:
     async def get_tutorial(self, tutorial_id: str) -> Optional[TutorialResponse]:
         """Get a specific tutorial by ID."""
         try:
-            if not self.db:
+            if self.db is None:
                 logger.warning("MongoDB not available - cannot retrieve tutorial")
                 return None
 
@@ -118,10 +126,14 @@ class TutorialService:
             if not tutorial:
                 return None
 
+            tutorial_image_url = media_service.normalize_url(tutorial["tutorial_image_url"])
+
             return TutorialResponse(
                 tutorial_id=tutorial["_id"],
                 subject=tutorial["subject"],
-                tutorial_image_url=tutorial["tutorial_image_url"],
+                tutorial_image_url=tutorial_image_url,
+                display_url=media_service.display_url(tutorial_image_url),
+                thumbnail_url=media_service.thumbnail_url(tutorial_image_url),
                 steps=[StepModel(**step) for step in tutorial["steps"]],
                 created_at=tutorial["created_at"]
             )
@@ -135,7 +147,7 @@ class TutorialService:
     ) -> TutorialListResponse:
         """Get paginated list of tutorials."""
         try:
-            if not self.db:
+            if self.db is None:
                 logger.warning("MongoDB not available - returning empty tutorial list")
                 return TutorialListResponse(
                     tutorials=[],
@@ -161,7 +173,7 @@ class TutorialService:
                     TutorialListItem(
                         tutorial_id=doc["_id"],
                         subject=doc["subject"],
-                        thumbnail_url=doc["tutorial_image_url"],  # Using full image as thumbnail for now
+                        thumbnail_url=media_service.thumbnail_url(doc["tutorial_image_url"]),
                         created_at=doc["created_at"]
                     )
                 )
@@ -210,11 +222,27 @@ class TutorialService:
             with open(filepath, "wb") as f:
                 f.write(image_bytes)
 
+            # Encode thumbnail and WebP/AVIF variants after responding; until
+            # they exist the media route serves the PNG
+            if self.encode_variants_in_background:
+                task = asyncio.create_task(self._encode_variants(filepath))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+            else:
+                media_service.encode_variants(filepath)
+
             # Return relative URL
-            return f"/static/tutorials/{filename}"
+            return media_service.tutorial_url(filename)
 
         except Exception as e:
             logger.error(f"Error saving tutorial image: {e}")
             raise
 
+    async def _encode_variants(self, filepath: str):
+        """Pre-encode the served variants of a tutorial image."""
+        try:
+            await asyncio.to_thread(media_service.encode_variants, filepath)
+        except Exception as e:
+            logger.warning(f"Could not encode variants for {filepath}: {e}")
+
 tutorial_service = TutorialService()
\ No newline at end of file
@@ -200,7 +200,7 @@ const TutorialDisplay = ({ tutorial, onBack }) => {
                 aspectRatio: '4 / 3',
                 maxWidth: '100%',
                 maxHeight: '100%',
-                backgroundImage: `url(${tutorial.tutorial_image_url})`,
+                backgroundImage: `url(${tutorial.display_url || tutorial.tutorial_image_url})`,
                 backgroundSize: '200% 200%',
                 backgroundPosition: `${stepPositions[currentStep].x}% ${stepPositions[currentStep].y}%`,
                 backgroundRepeat: 'no-repeat',
@@ -224,7 +224,7 @@ const TutorialDisplay = ({ tutorial, onBack }) => {
                   aspectRatio: '1',
                   maxWidth: '100%',
                   maxHeight: '100%',
-                  backgroundImage: `url(${tutorial.tutorial_image_url})`,
+                  backgroundImage: `url(${tutorial.display_url || tutorial.tutorial_image_url})`,
                   backgroundSize: '200% 200%',
                   backgroundPosition: '100% 100%',
                   backgroundRepeat: 'no-repeat',
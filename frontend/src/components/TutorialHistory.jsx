@@ -140,7 +140,7 @@ const TutorialHistory = ({ onSelectTutorial }) => {
                 <div
                   className="w-full h-full"
                   style={{
-                    backgroundImage: `url(${tutorial.tutorial_image_url})`,
+                    backgroundImage: `url(${tutorial.thumbnail_url || tutorial.tutorial_image_url})`,
                     backgroundSize: '200% 200%',
                     backgroundPosition: '100% 100%', // Bottom-right quadrant (final result)
                     backgroundRepeat: 'no-repeat',
@@ -11,6 +11,10 @@ export default defineConfig({
         target: 'http://localhost:8000',
         changeOrigin: true,
       },
+      '/media': {
+        target: 'http://localhost:8000',
+        changeOrigin: true,
+      },
       '/static': {
         target: 'http://localhost:8000',
         changeOrigin: true,